@@ -3,11 +3,1482 @@ from tkinter import ttk, messagebox
 import json
 import os
 import requests
-from datetime import datetime
+from abc import ABC, abstractmethod
+from datetime import datetime, timezone
 from pathlib import Path
+from urllib.parse import urlparse, parse_qs
+from urllib.request import getproxies, proxy_bypass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 import threading
 import time
 import sys
+import argparse
+import csv
+import heapq
+import math
+import shutil
+import socket
+import struct
+from array import array
+
+# Snapshot file for shell prompts and status bars, see SnapshotFile; the
+# reader lives in its own module so prompts don't import tkinter/requests
+from usage_snapshot import (
+    SNAPSHOT_MAGIC, SNAPSHOT_VERSION, SNAPSHOT_STRUCT, SNAPSHOT_OFFLINE,
+    DEFAULT_FORMAT, DEFAULT_STALE_SUFFIX, read_snapshot, format_snapshot
+)
+
+# Length of each usage window in seconds
+FIVE_HOUR_WINDOW = 5 * 3600
+SEVEN_DAY_WINDOW = 7 * 24 * 3600
+
+# Usage limits shown even when the API leaves them out, their titles and
+# bar colors; any other bucket in the payload gets a section of its own
+CORE_LIMITS = ['five_hour', 'seven_day']
+LIMIT_TITLES = {'five_hour': "5-Hour Limit", 'seven_day': "Weekly Limit"}
+LIMIT_COLORS = {'five_hour': '#CC785C', 'seven_day': '#8B6BB7'}
+EXTRA_LIMIT_COLORS = ['#5B9BD5', '#6BB78B', '#C9A24D', '#B76B8B']
+
+# History older than the 'history_days' config key is trimmed from the file,
+# checked at most this often
+HISTORY_TRIM_INTERVAL = 24 * 3600
+
+# In-memory history: a week of samples at the shortest poll interval
+SAMPLE_RING_CAPACITY = SEVEN_DAY_WINDOW // 10
+
+# Polling: how often the poller wakes to look for suspend/resume, the clock
+# gap that counts as a resume, and how often to probe while offline
+POLL_STEP = 5
+RESUME_THRESHOLD = 30
+OFFLINE_PROBE_INTERVAL = 15
+PROBE_TIMEOUT = 3
+
+# Render ticks: the slowest rate while the user is away, and how long
+# without input counts as away
+IDLE_TICK_MS = 30000
+IDLE_AFTER_MS = 5 * 60 * 1000
+
+# Windows sends no event when the overlay's virtual desktop comes back, so
+# while DWM has it cloaked the tick re-checks at this rate
+CLOAKED_RECHECK_MS = 2000
+DWMWA_CLOAKED = 14
+
+# UI dispatch queue: lower runs first; drains are capped so a burst of
+# posts can't starve Tk's own event handling
+PRIORITY_HIGH = 0
+PRIORITY_NORMAL = 1
+UI_DRAIN_MAX_ITEMS = 20
+UI_DRAIN_BUDGET = 0.01
+
+# The Tk thread checks the queue on a timer that backs off from the first to
+# the second interval while nothing is posted (background threads never call
+# into Tcl, which raises unless Tk's main loop owns the interpreter)
+UI_POLL_MIN_MS = 50
+UI_POLL_MAX_MS = 1000
+
+# LAN collector
+COLLECTOR_PORT = 8765
+COLLECTOR_KEEPALIVE = 15
+COLLECTOR_RETRY_DELAY = 5
+COLLECTOR_HISTORY_BATCH = 5000
+
+
+class Clock:
+    """Time source for everything that schedules or timestamps usage.
+    
+    The soak test swaps in a VirtualClock to run days of polling in minutes.
+    """
+
+    def time(self):
+        return time.time()
+
+    def monotonic(self):
+        return time.monotonic()
+
+    def to_real(self, seconds):
+        """Real seconds corresponding to `seconds` of clock time"""
+        return seconds
+
+    def sleep(self, seconds):
+        time.sleep(seconds)
+
+    def wait(self, event, timeout):
+        """Wait on a threading.Event for up to `timeout` clock seconds"""
+        return event.wait(timeout)
+
+
+class VirtualClock(Clock):
+    """Clock running `speed` times faster than real time"""
+
+    def __init__(self, speed):
+        self.speed = speed
+        self.wall_start = time.time()
+        self.real_start = time.monotonic()
+
+    def elapsed(self):
+        return (time.monotonic() - self.real_start) * self.speed
+
+    def time(self):
+        return self.wall_start + self.elapsed()
+
+    def monotonic(self):
+        return self.real_start + self.elapsed()
+
+    def to_real(self, seconds):
+        return seconds / self.speed
+
+    def sleep(self, seconds):
+        time.sleep(seconds / self.speed)
+
+    def wait(self, event, timeout):
+        return event.wait(timeout / self.speed)
+
+
+clock = Clock()
+
+
+def get_app_data_dir():
+    """Per-user directory holding config and usage history"""
+    base = os.getenv('APPDATA') or os.getenv('XDG_CONFIG_HOME') or Path.home() / '.config'
+    return Path(base) / 'ClaudeUsageBar'
+
+
+def parse_reset_epoch(resets_at):
+    """Convert an API 'resets_at' timestamp into epoch seconds (or None)"""
+    if not resets_at:
+        return None
+
+    try:
+        from dateutil import parser as date_parser
+    except ImportError:
+        import subprocess
+        subprocess.check_call([sys.executable, "-m", "pip", "install", "python-dateutil"])
+        from dateutil import parser as date_parser
+
+    try:
+        return date_parser.parse(resets_at).timestamp()
+    except:
+        return None
+
+
+class UsageWindow:
+    """One limit bucket from the usage payload, e.g. five_hour or seven_day_opus"""
+
+    __slots__ = ('key', 'utilization', 'resets_at')
+
+    def __init__(self, key, utilization, resets_at):
+        self.key = key
+        self.utilization = utilization
+        self.resets_at = resets_at
+
+
+def parse_usage(usage_data):
+    """Parse every limit bucket in a usage payload into UsageWindows.
+    
+    Anything shaped like {'utilization': ..., 'resets_at': ...} counts as a
+    bucket; null buckets and unknown fields are skipped, so new or removed
+    limits don't break parsing. Core limits come first, then the rest in
+    payload order.
+    """
+    windows = []
+    if not isinstance(usage_data, dict):
+        return windows
+    
+    for key, value in usage_data.items():
+        if not isinstance(value, dict) or value.get('utilization') is None:
+            continue
+        try:
+            utilization = float(value['utilization'])
+        except (TypeError, ValueError):
+            continue
+        windows.append(UsageWindow(key, utilization, parse_reset_epoch(value.get('resets_at'))))
+    
+    windows.sort(key=lambda window: CORE_LIMITS.index(window.key)
+                 if window.key in CORE_LIMITS else len(CORE_LIMITS))
+    return windows
+
+
+def limit_title(key):
+    """Section title for a limit key, e.g. seven_day_opus -> 'Weekly Limit (Opus)'"""
+    if key in LIMIT_TITLES:
+        return LIMIT_TITLES[key]
+    for core in CORE_LIMITS:
+        if key.startswith(core + '_'):
+            detail = key[len(core) + 1:].replace('_', ' ').title()
+            return f"{LIMIT_TITLES[core]} ({detail})"
+    return key.replace('_', ' ').title()
+
+
+def sample_from_usage(windows, timestamp=None):
+    """Flatten parsed UsageWindows (see parse_usage) into a history sample"""
+    by_key = {window.key: window for window in windows}
+    five_hour = by_key.get('five_hour') or UsageWindow('five_hour', 0.0, None)
+    seven_day = by_key.get('seven_day') or UsageWindow('seven_day', 0.0, None)
+    return {
+        't': round(timestamp if timestamp is not None else clock.time(), 3),
+        'five_hour': five_hour.utilization,
+        'seven_day': seven_day.utilization,
+        'five_hour_resets_at': five_hour.resets_at,
+        'seven_day_resets_at': seven_day.resets_at,
+    }
+
+
+class UsageHistory:
+    """Append-only JSON Lines log of utilization samples, in time order.
+    
+    Lookups by time binary-search the file's byte offsets, so reading the
+    last week costs the same however long the file has grown. With a
+    retention (in seconds), older samples are trimmed from the start of the
+    file about once a day.
+    """
+
+    def __init__(self, path, retention=None):
+        self.path = Path(path)
+        self.retention = retention
+        self.next_trim = 0
+
+    def record(self, windows, timestamp=None):
+        """Append a sample for the given parsed usage and return it"""
+        sample = sample_from_usage(windows, timestamp)
+        self.append([sample])
+        return sample
+
+    def append(self, samples):
+        """Append already-built samples, e.g. synced from a collector"""
+        try:
+            with open(self.path, 'a') as f:
+                for sample in samples:
+                    f.write(json.dumps(sample, separators=(',', ':')) + '\n')
+        except:
+            pass
+        
+        if self.retention and clock.monotonic() >= self.next_trim:
+            self.next_trim = clock.monotonic() + HISTORY_TRIM_INTERVAL
+            self.trim(clock.time() - self.retention)
+
+    def last_timestamp(self):
+        """Timestamp of the newest sample, read from the end of the file"""
+        try:
+            with open(self.path, 'rb') as f:
+                f.seek(0, os.SEEK_END)
+                f.seek(max(0, f.tell() - 4096))
+                lines = f.read().splitlines()
+        except OSError:
+            return None
+
+        for line in reversed(lines):
+            try:
+                return json.loads(line)['t']
+            except:
+                continue
+        return None
+
+    @staticmethod
+    def next_timestamp(f):
+        """Timestamp of the next complete sample in `f` (advancing past it), or None at EOF"""
+        for line in f:
+            try:
+                return json.loads(line)['t']
+            except:
+                continue
+        return None
+
+    def seek_time(self, f, since):
+        """Position `f` on a line boundary before the first sample with t >= since"""
+        f.seek(0, os.SEEK_END)
+        lo, hi = 0, f.tell()
+        while hi - lo > 4096:
+            mid = (lo + hi) // 2
+            f.seek(mid)
+            f.readline()  # skip the partial line
+            t = self.next_timestamp(f)
+            if t is not None and t < since:
+                lo = mid
+            else:
+                hi = mid
+        f.seek(lo)
+        if lo:
+            f.readline()
+
+    def trim(self, before):
+        """Drop samples older than `before`, rewriting the file only when there are any"""
+        tmp_path = self.path.with_suffix('.tmp')
+        try:
+            with open(self.path, 'rb') as f:
+                first = self.next_timestamp(f)
+                if first is None or first >= before:
+                    return
+                self.seek_time(f, before)
+                with open(tmp_path, 'wb') as out:
+                    shutil.copyfileobj(f, out)
+            os.replace(tmp_path, self.path)
+        except OSError:
+            pass
+
+    def iter_samples(self, since=None, until=None):
+        """Yield recorded samples in file order, optionally limited to [since, until)"""
+        if not self.path.exists():
+            return
+
+        with open(self.path, 'rb') as f:
+            if since is not None:
+                self.seek_time(f, since)
+            for line in f:
+                try:
+                    sample = json.loads(line)
+                    t = sample['t']
+                except:
+                    continue
+                if since is not None and t < since:
+                    continue
+                if until is not None and t >= until:
+                    continue
+                yield sample
+
+
+def load_config_file(config_file):
+    """Read config.json merged over the defaults"""
+    default = {
+        'position': {'x': 20, 'y': 80},
+        'opacity': 0.9,
+        'poll_interval': 60,
+        'provider': 'claude',
+        'api_base': 'https://claude.ai',
+        'collector_url': None,
+        'history_days': 90
+    }
+    
+    if config_file.exists():
+        try:
+            with open(config_file, 'r') as f:
+                loaded = json.load(f)
+                return {**default, **loaded}
+        except:
+            pass
+    
+    return default
+
+
+def history_retention(config):
+    """Seconds of history to keep, or None to keep everything"""
+    days = config.get('history_days')
+    return days * 86400 if days else None
+
+
+class AuthError(Exception):
+    """Raised when the usage API rejects the stored session"""
+
+
+class CredentialStore:
+    """Session cookies, encrypted at rest and decrypted once into memory.
+    
+    The Fernet key lives in the OS keyring when the `keyring` package has a
+    working backend, otherwise in credentials.key next to the data,
+    readable only by the current user.
+    """
+
+    keyring_service = 'ClaudeUsageBar'
+    keyring_user = 'credentials-key'
+
+    def __init__(self, app_data_dir):
+        self.path = Path(app_data_dir) / 'credentials.bin'
+        self.key_path = Path(app_data_dir) / 'credentials.key'
+        self.lock = threading.RLock()
+        self.cookies = None
+        # Bumped whenever the session is replaced or cleared
+        self.generation = 0
+
+    @property
+    def session_key(self):
+        return self.load().get('sessionKey')
+
+    def get_fernet(self, create):
+        try:
+            from cryptography.fernet import Fernet
+        except ImportError:
+            import subprocess
+            subprocess.check_call([sys.executable, "-m", "pip", "install", "cryptography"])
+            from cryptography.fernet import Fernet
+        
+        # An existing key file wins, so installing keyring later can't
+        # orphan credentials that were encrypted with it
+        if self.key_path.exists():
+            return Fernet(self.key_path.read_bytes())
+        
+        try:
+            import keyring
+            key = keyring.get_password(self.keyring_service, self.keyring_user)
+            if key is None and create:
+                key = Fernet.generate_key().decode()
+                keyring.set_password(self.keyring_service, self.keyring_user, key)
+            if key is not None:
+                return Fernet(key.encode())
+        except Exception:
+            # No keyring package or no usable backend (e.g. headless Linux)
+            pass
+        
+        if not create:
+            return None
+        key = Fernet.generate_key()
+        fd = os.open(self.key_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, 'wb') as f:
+            f.write(key)
+        return Fernet(key)
+
+    def load(self):
+        """Cookies as a name -> value dict (decrypted on first use only)"""
+        with self.lock:
+            if self.cookies is None:
+                self.cookies = {}
+                if self.path.exists():
+                    try:
+                        fernet = self.get_fernet(create=False)
+                        if fernet:
+                            self.cookies = json.loads(fernet.decrypt(self.path.read_bytes()))
+                    except Exception:
+                        # Unreadable or encrypted with a lost key: log in again
+                        pass
+            return self.cookies
+
+    def save(self, cookies, generation=None):
+        """Encrypt and store cookies, skipping the write if nothing changed.
+        
+        Cookies rotated by the server pass the `generation` their session was
+        built from; they are dropped if the session was cleared or replaced
+        since, so an in-flight request can't undo a logout.
+        """
+        with self.lock:
+            if generation is None:
+                self.generation += 1
+            elif generation != self.generation:
+                return
+            if cookies == self.cookies:
+                return
+            token = self.get_fernet(create=True).encrypt(json.dumps(cookies).encode())
+            temp_path = self.path.with_name(self.path.name + '.tmp')
+            with open(temp_path, 'wb') as f:
+                f.write(token)
+            os.replace(temp_path, self.path)
+            self.cookies = dict(cookies)
+
+    def clear(self):
+        with self.lock:
+            self.generation += 1
+            self.cookies = {}
+            try:
+                self.path.unlink()
+            except FileNotFoundError:
+                pass
+
+    def migrate_from_config(self, config):
+        """Move plaintext session_key/cookie_string out of config.json.
+        
+        Returns True if the config changed and should be saved.
+        """
+        if 'session_key' not in config and 'cookie_string' not in config:
+            return False
+        
+        session_key = config.pop('session_key', None)
+        cookie_string = config.pop('cookie_string', None)
+        cookies = {}
+        for cookie_pair in (cookie_string or '').split('; '):
+            if '=' in cookie_pair:
+                name, value = cookie_pair.split('=', 1)
+                cookies[name] = value
+        if session_key:
+            cookies.setdefault('sessionKey', session_key)
+        if cookies:
+            self.save(cookies)
+        return True
+
+
+class UsageProvider(ABC):
+    """Where usage data comes from.
+    
+    Subclasses implement fetch_orgs, fetch_usage and refresh_auth. Fetch
+    methods return None when data could not be fetched and raise AuthError
+    when the credentials are rejected.
+    """
+
+    def has_credentials(self):
+        return True
+
+    def is_reachable(self):
+        """Cheap check run before each poll; False skips the fetch"""
+        return True
+
+    @abstractmethod
+    def fetch_orgs(self):
+        """List of organizations, each with a 'uuid'"""
+
+    @abstractmethod
+    def fetch_usage(self, org_id):
+        """Usage payload for one organization"""
+
+    def refresh_auth(self):
+        """Pick up new credentials, e.g. after logging in again"""
+
+    def fetch_usage_data(self):
+        """Usage payload for the first organization, or None"""
+        try:
+            orgs = self.fetch_orgs()
+            if orgs and len(orgs) > 0:
+                return self.fetch_usage(orgs[0].get('uuid'))
+            return None
+        except AuthError:
+            raise
+        except Exception:
+            return None
+
+
+class ClaudeWebProvider(UsageProvider):
+    """claude.ai web API, using cloudscraper to get past Cloudflare"""
+
+    headers = {
+        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
+        'Accept': 'application/json',
+        'Accept-Language': 'en-US,en;q=0.9',
+        'Sec-Fetch-Dest': 'empty',
+        'Sec-Fetch-Mode': 'cors',
+        'Sec-Fetch-Site': 'same-origin',
+        'sec-ch-ua': '"Not_A Brand";v="8", "Chromium";v="120", "Google Chrome";v="120"',
+        'sec-ch-ua-mobile': '?0',
+        'sec-ch-ua-platform': '"Windows"',
+    }
+
+    def __init__(self, config, credentials):
+        self.config = config
+        self.credentials = credentials
+        self.api_base = config.get('api_base') or 'https://claude.ai'
+        self.scraper = None
+        self.scraper_generation = None
+
+    def has_credentials(self):
+        return bool(self.credentials.session_key)
+
+    def is_reachable(self):
+        return network_available(self.api_base)
+
+    def refresh_auth(self):
+        # The next request builds a new session from the stored cookies
+        self.scraper = None
+
+    def get_scraper(self):
+        """Session for the current credentials and their generation (rebuilt after a clear/login)"""
+        scraper, generation = self.scraper, self.credentials.generation
+        if scraper is not None and self.scraper_generation == generation:
+            return scraper, generation
+        
+        # Use cloudscraper to bypass Cloudflare
+        try:
+            import cloudscraper
+        except ImportError:
+            import subprocess
+            subprocess.check_call([sys.executable, "-m", "pip", "install", "cloudscraper"])
+            import cloudscraper
+        
+        # Create a scraper that bypasses Cloudflare
+        scraper = cloudscraper.create_scraper(
+            browser={
+                'browser': 'chrome',
+                'platform': 'windows',
+                'mobile': False
+            }
+        )
+        
+        # Cookies are decrypted once and then live in the scraper's jar
+        cookie_domain = urlparse(self.api_base).hostname
+        for name, value in self.credentials.load().items():
+            scraper.cookies.set(name, value, domain=cookie_domain)
+        
+        self.scraper = scraper
+        self.scraper_generation = generation
+        return scraper, generation
+
+    def get(self, path):
+        scraper, generation = self.get_scraper()
+        response = scraper.get(
+            f'{self.api_base}{path}',
+            headers={**self.headers, 'Referer': f'{self.api_base}/chats'},
+            timeout=15
+        )
+        
+        # Persist only when the server rotated a cookie
+        cookies = {cookie.name: cookie.value for cookie in scraper.cookies}
+        if cookies != self.credentials.load():
+            self.credentials.save(cookies, generation)
+        return response
+
+    def fetch_orgs(self):
+        if not self.has_credentials():
+            return None
+        
+        response = self.get('/api/organizations')
+        if response.status_code == 200:
+            return response.json()
+        elif response.status_code == 401:
+            raise AuthError("Session expired")
+        return None
+
+    def fetch_usage(self, org_id):
+        response = self.get(f'/api/organizations/{org_id}/usage')
+        if response.status_code == 200:
+            return response.json()
+        return None
+
+
+def linear_curve(length, peak):
+    """Utilization rising steadily from 0 to `peak` over a window"""
+    return lambda elapsed: peak * elapsed / length
+
+
+def scripted_curve(points):
+    """Piecewise-linear utilization from (seconds into window, utilization) points"""
+    points = sorted(points)
+
+    def curve(elapsed):
+        if elapsed <= points[0][0]:
+            return points[0][1]
+        for (t0, u0), (t1, u1) in zip(points, points[1:]):
+            if elapsed <= t1:
+                return u0 + (u1 - u0) * (elapsed - t0) / (t1 - t0)
+        return points[-1][1]
+
+    return curve
+
+
+class FakeUsageProvider(UsageProvider):
+    """Deterministic in-process provider for benchmarks and soak tests.
+    
+    Windows start on multiples of their length (in `time_source` time) and
+    utilization follows the given curves, so a run is reproducible without
+    any network access.
+    """
+
+    def __init__(self, time_source=None, five_hour_curve=None, seven_day_curve=None, latency=0):
+        self.time_source = time_source or (lambda: clock.time())
+        self.curves = {
+            'five_hour': (FIVE_HOUR_WINDOW, five_hour_curve or linear_curve(FIVE_HOUR_WINDOW, 95)),
+            'seven_day': (SEVEN_DAY_WINDOW, seven_day_curve or linear_curve(SEVEN_DAY_WINDOW, 60)),
+        }
+        self.latency = latency
+        self.requests = 0
+
+    def fetch_orgs(self):
+        self.requests += 1
+        return [{'uuid': 'fake-org', 'name': 'Fake Org'}]
+
+    def fetch_usage(self, org_id):
+        self.requests += 1
+        if self.latency:
+            time.sleep(self.latency)
+        
+        now = self.time_source()
+        usage = {}
+        for key, (length, curve) in self.curves.items():
+            window_start = now - now % length
+            resets_at = datetime.fromtimestamp(window_start + length, timezone.utc)
+            usage[key] = {
+                'utilization': round(min(max(curve(now - window_start), 0), 100), 1),
+                'resets_at': resets_at.isoformat(),
+            }
+        return usage
+
+
+def fake_provider_from_config(config):
+    """FakeUsageProvider following the 'fake_curves' config key.
+    
+    'fake_curves' maps 'five_hour' and/or 'seven_day' to a list of
+    [seconds into window, utilization] points; missing windows rise linearly.
+    """
+    curves = config.get('fake_curves') or {}
+    return FakeUsageProvider(
+        five_hour_curve=scripted_curve(curves['five_hour']) if curves.get('five_hour') else None,
+        seven_day_curve=scripted_curve(curves['seven_day']) if curves.get('seven_day') else None
+    )
+
+
+def make_provider(config, credentials):
+    """Provider selected by the 'provider' config key"""
+    if config.get('provider') == 'fake':
+        return fake_provider_from_config(config)
+    return ClaudeWebProvider(config, credentials)
+
+
+def network_available(url, timeout=PROBE_TIMEOUT):
+    """Cheap reachability check: open and close a TCP connection to the URL's host.
+    
+    Behind a proxy (HTTP(S)_PROXY, or the system setting on Windows) the
+    API host may not be directly reachable at all, so probe the proxy the
+    real requests go through instead.
+    """
+    parsed = urlparse(url)
+    proxies = getproxies()
+    proxy = proxies.get(parsed.scheme) or proxies.get('all')
+    if proxy and not proxy_bypass(parsed.hostname or ''):
+        parsed = urlparse(proxy if '://' in proxy else f'http://{proxy}')
+    port = parsed.port or (443 if parsed.scheme == 'https' else 80)
+    try:
+        with socket.create_connection((parsed.hostname, port), timeout=timeout):
+            return True
+    except (OSError, ValueError):
+        return False
+
+
+def iter_collector_history(base_url, since):
+    """Yield batches of history samples newer than `since` from a collector"""
+    while True:
+        response = requests.get(
+            f'{base_url}/history',
+            params={'since': since, 'limit': COLLECTOR_HISTORY_BATCH},
+            timeout=30
+        )
+        response.raise_for_status()
+        batch = [json.loads(line) for line in response.text.splitlines() if line]
+        if not batch:
+            return
+        yield batch
+        if len(batch) < COLLECTOR_HISTORY_BATCH:
+            return
+        since = batch[-1]['t']
+
+
+def find_local_collector(app_data_dir):
+    """URL of a collector running on this machine (see UsageCollector.serve_forever), or None"""
+    try:
+        with open(Path(app_data_dir) / 'collector.json') as f:
+            url = json.load(f)['url']
+        parsed = urlparse(url)
+        with socket.create_connection((parsed.hostname, parsed.port), timeout=PROBE_TIMEOUT):
+            return url
+    except Exception:
+        return None
+
+
+def iter_collector_events(base_url):
+    """Yield {'usage', 'sample'} messages from a collector's event stream"""
+    with requests.get(
+        f'{base_url}/events',
+        stream=True,
+        timeout=(5, COLLECTOR_KEEPALIVE * 4)
+    ) as response:
+        response.raise_for_status()
+        # Messages are smaller than requests' default 512-byte chunk, so
+        # read byte by byte or each one waits for the next to fill the chunk
+        for line in response.iter_lines(chunk_size=1, decode_unicode=True):
+            if line and line.startswith('data:'):
+                yield json.loads(line[5:])
+
+
+class UsageCollector:
+    """Polls the usage API once on behalf of every machine on the LAN.
+
+    Subscribers read the latest usage from /usage, follow /events
+    (server-sent events) and sync recorded samples from /history in
+    batches, so upstream traffic does not grow with the number of machines.
+    """
+
+    def __init__(self, config, provider, history, snapshot=None):
+        self.config = config
+        self.provider = provider
+        self.history = history
+        self.snapshot = snapshot
+        self.condition = threading.Condition()
+        self.seq = 0
+        self.latest = None
+
+    def publish(self, data):
+        """Record a fresh payload and wake up every event stream"""
+        sample = self.history.record(parse_usage(data))
+        if self.snapshot:
+            self.snapshot.publish(sample, self.config['poll_interval'])
+        message = json.dumps({'usage': data, 'sample': sample}, separators=(',', ':'))
+        with self.condition:
+            self.seq += 1
+            self.latest = message.encode()
+            self.condition.notify_all()
+
+    def wait_for_update(self, seq, timeout):
+        """Block until a message newer than `seq` exists; returns (seq, message)"""
+        with self.condition:
+            self.condition.wait_for(lambda: self.seq != seq, timeout)
+            return self.seq, self.latest
+
+    def poll_forever(self):
+        while True:
+            data = None
+            if self.provider.is_reachable():
+                try:
+                    data = self.provider.fetch_usage_data()
+                except AuthError:
+                    print("Session expired; sign in with the overlay to renew it", file=sys.stderr)
+            if data:
+                self.publish(data)
+            clock.sleep(self.config['poll_interval'])
+
+    def serve_forever(self, host, port, advert_path=None):
+        """Serve until interrupted.
+        
+        If `advert_path` is given, the collector's local URL is written there
+        while it runs, so an overlay on this machine subscribes to it instead
+        of polling upstream a second time.
+        """
+        threading.Thread(target=self.poll_forever, daemon=True).start()
+        server = ThreadingHTTPServer((host, port), CollectorRequestHandler)
+        server.daemon_threads = True
+        server.collector = self
+        print(f"Collector listening on http://{host}:{server.server_port}", file=sys.stderr)
+        if advert_path:
+            # Loopback only answers when bound to every interface
+            local_host = '127.0.0.1' if host in ('', '0.0.0.0') else host
+            with open(advert_path, 'w') as f:
+                json.dump({'url': f'http://{local_host}:{server.server_port}', 'pid': os.getpid()}, f)
+        try:
+            server.serve_forever()
+        finally:
+            server.server_close()
+            if advert_path:
+                try:
+                    os.remove(advert_path)
+                except OSError:
+                    pass
+
+
+class CollectorRequestHandler(BaseHTTPRequestHandler):
+    """HTTP endpoints served by UsageCollector"""
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        query = parse_qs(url.query)
+        try:
+            if url.path == '/usage':
+                self.send_usage()
+            elif url.path == '/events':
+                self.send_events()
+            elif url.path == '/history':
+                since = float(query.get('since', ['0'])[0])
+                limit = int(query.get('limit', [COLLECTOR_HISTORY_BATCH])[0])
+                self.send_history(since, limit)
+            else:
+                self.send_error(404)
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+    def send_usage(self):
+        message = self.server.collector.latest
+        if message is None:
+            self.send_error(503, "No usage fetched yet")
+            return
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(message)))
+        self.end_headers()
+        self.wfile.write(message)
+
+    def send_events(self):
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream')
+        self.send_header('Cache-Control', 'no-cache')
+        self.end_headers()
+
+        collector = self.server.collector
+        seq, message = collector.seq, collector.latest
+        if message is not None:
+            self.wfile.write(b'data: ' + message + b'\n\n')
+            self.wfile.flush()
+
+        while True:
+            new_seq, message = collector.wait_for_update(seq, COLLECTOR_KEEPALIVE)
+            if new_seq == seq:
+                self.wfile.write(b': keepalive\n\n')
+            else:
+                seq = new_seq
+                self.wfile.write(b'data: ' + message + b'\n\n')
+            self.wfile.flush()
+
+    def send_history(self, since, limit):
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/x-ndjson')
+        self.end_headers()
+
+        sent = 0
+        for sample in self.server.collector.history.iter_samples(since=since):
+            if sample['t'] <= since:
+                continue
+            self.wfile.write(json.dumps(sample, separators=(',', ':')).encode() + b'\n')
+            sent += 1
+            if sent >= limit:
+                break
+
+    def log_message(self, format, *args):
+        pass
+
+
+class SampleRing:
+    """Fixed-capacity ring of history samples stored as packed array columns.
+    
+    Each sample costs 24 bytes (a double timestamp, two float32
+    utilizations and two uint32 reset epochs) instead of a few hundred for
+    a parsed dict. Missing reset times are stored as 0. The oldest sample
+    is overwritten once the ring is full.
+    """
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.times = array('d', bytes(8 * capacity))
+        self.five_hour = array('f', bytes(4 * capacity))
+        self.seven_day = array('f', bytes(4 * capacity))
+        self.five_hour_resets = array('I', bytes(4 * capacity))
+        self.seven_day_resets = array('I', bytes(4 * capacity))
+        self.start = 0
+        self.count = 0
+
+    def append(self, sample):
+        """Store a sample dict (as produced by sample_from_usage)"""
+        if self.count < self.capacity:
+            slot = (self.start + self.count) % self.capacity
+            self.count += 1
+        else:
+            slot = self.start
+            self.start = (self.start + 1) % self.capacity
+
+        self.times[slot] = sample['t']
+        self.five_hour[slot] = sample['five_hour']
+        self.seven_day[slot] = sample['seven_day']
+        self.five_hour_resets[slot] = int(sample['five_hour_resets_at'] or 0)
+        self.seven_day_resets[slot] = int(sample['seven_day_resets_at'] or 0)
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += self.count
+        if not 0 <= index < self.count:
+            raise IndexError('sample index out of range')
+        return SampleView(self, (self.start + index) % self.capacity)
+
+    def __iter__(self):
+        for index in range(self.count):
+            yield SampleView(self, (self.start + index) % self.capacity)
+
+    def iter_since(self, since):
+        """Yield samples with t >= since, found by binary search"""
+        lo, hi = 0, self.count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self.times[(self.start + mid) % self.capacity] < since:
+                lo = mid + 1
+            else:
+                hi = mid
+        for index in range(lo, self.count):
+            yield SampleView(self, (self.start + index) % self.capacity)
+
+    def nbytes(self):
+        """Bytes used by the column storage"""
+        return sum(
+            column.itemsize * len(column)
+            for column in (self.times, self.five_hour, self.seven_day,
+                           self.five_hour_resets, self.seven_day_resets)
+        )
+
+
+class SampleView:
+    """Read-only view of one slot in a SampleRing"""
+
+    __slots__ = ('ring', 'slot')
+
+    def __init__(self, ring, slot):
+        self.ring = ring
+        self.slot = slot
+
+    @property
+    def t(self):
+        return self.ring.times[self.slot]
+
+    @property
+    def five_hour(self):
+        return self.ring.five_hour[self.slot]
+
+    @property
+    def seven_day(self):
+        return self.ring.seven_day[self.slot]
+
+    @property
+    def five_hour_resets_at(self):
+        return self.ring.five_hour_resets[self.slot] or None
+
+    @property
+    def seven_day_resets_at(self):
+        return self.ring.seven_day_resets[self.slot] or None
+
+    def as_dict(self):
+        return {
+            't': self.t,
+            'five_hour': self.five_hour,
+            'seven_day': self.seven_day,
+            'five_hour_resets_at': self.five_hour_resets_at,
+            'seven_day_resets_at': self.seven_day_resets_at,
+        }
+
+
+def current_rss():
+    """Resident set size of this process in bytes, or None if unknown"""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, AttributeError):
+        pass
+
+    if sys.platform == 'win32':
+        import ctypes
+        from ctypes import wintypes
+
+        class PROCESS_MEMORY_COUNTERS(ctypes.Structure):
+            _fields_ = [
+                ('cb', wintypes.DWORD),
+                ('PageFaultCount', wintypes.DWORD),
+                ('PeakWorkingSetSize', ctypes.c_size_t),
+                ('WorkingSetSize', ctypes.c_size_t),
+                ('QuotaPeakPagedPoolUsage', ctypes.c_size_t),
+                ('QuotaPagedPoolUsage', ctypes.c_size_t),
+                ('QuotaPeakNonPagedPoolUsage', ctypes.c_size_t),
+                ('QuotaNonPagedPoolUsage', ctypes.c_size_t),
+                ('PagefileUsage', ctypes.c_size_t),
+                ('PeakPagefileUsage', ctypes.c_size_t),
+            ]
+
+        counters = PROCESS_MEMORY_COUNTERS()
+        counters.cb = ctypes.sizeof(counters)
+        handle = ctypes.windll.kernel32.GetCurrentProcess()
+        if ctypes.windll.psapi.GetProcessMemoryInfo(handle, ctypes.byref(counters), counters.cb):
+            return counters.WorkingSetSize
+
+    return None
+
+
+def window_cloaked(root):
+    """True when DWM hides the window, e.g. it is on another virtual desktop (Windows only)"""
+    if sys.platform != 'win32':
+        return False
+    
+    import ctypes
+    from ctypes import wintypes
+    
+    try:
+        # winfo_id is Tk's client window; DWM tracks the top-level (GA_ROOT)
+        hwnd = ctypes.windll.user32.GetAncestor(root.winfo_id(), 2)
+        cloaked = wintypes.DWORD()
+        result = ctypes.windll.dwmapi.DwmGetWindowAttribute(
+            wintypes.HWND(hwnd),
+            DWMWA_CLOAKED,
+            ctypes.byref(cloaked),
+            ctypes.sizeof(cloaked)
+        )
+        return result == 0 and cloaked.value != 0
+    except (OSError, AttributeError, tk.TclError):
+        return False
+
+
+class SnapshotFile:
+    """Latest usage in a 64-byte fixed-layout file, for tools that poll often.
+    
+    Little-endian layout:
+    
+        0   4s  magic b'CUSB'
+        4   u16 version (1)
+        6   u16 flags (bit 0: poller is offline)
+        8   u32 sequence number, bumped on every write
+        12  u32 reserved
+        16  f64 fetched_at (epoch seconds)
+        24  f64 stale_after (epoch seconds; older data than this is stale)
+        32  f64 five_hour utilization (%)
+        40  f64 seven_day utilization (%)
+        48  f64 five_hour resets_at (epoch seconds, 0 if none)
+        56  f64 seven_day resets_at (epoch seconds, 0 if none)
+    
+    The file is replaced atomically, so one read always sees a whole record.
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.lock = threading.Lock()
+        self.seq = 0
+        self.sample = None
+        self.stale_after = 0.0
+        self.online = True
+
+    def publish(self, sample, poll_interval):
+        """Write a freshly fetched sample; it goes stale after two missed polls"""
+        with self.lock:
+            self.sample = sample
+            self.stale_after = sample['t'] + 2 * poll_interval
+            self.online = True
+            self.write()
+
+    def set_online(self, online):
+        with self.lock:
+            if online == self.online:
+                return
+            self.online = online
+            if self.sample:
+                self.write()
+
+    def write(self):
+        self.seq += 1
+        sample = self.sample
+        record = SNAPSHOT_STRUCT.pack(
+            SNAPSHOT_MAGIC,
+            SNAPSHOT_VERSION,
+            0 if self.online else SNAPSHOT_OFFLINE,
+            self.seq & 0xFFFFFFFF,
+            0,
+            sample['t'],
+            self.stale_after,
+            sample['five_hour'],
+            sample['seven_day'],
+            sample['five_hour_resets_at'] or 0.0,
+            sample['seven_day_resets_at'] or 0.0,
+        )
+        
+        temp_path = self.path.with_name(self.path.name + '.tmp')
+        try:
+            with open(temp_path, 'wb') as f:
+                f.write(record)
+            os.replace(temp_path, self.path)
+        except OSError:
+            # e.g. a reader holding the file open on Windows; the next
+            # fetch writes it again
+            pass
+
+
+class StandInApiHandler(BaseHTTPRequestHandler):
+    """Local imitation of the claude.ai endpoints, answered by server.provider"""
+
+    def do_GET(self):
+        parts = urlparse(self.path).path.strip('/').split('/')
+        provider = self.server.provider
+        if parts == ['api', 'organizations']:
+            body = provider.fetch_orgs()
+        elif len(parts) == 4 and parts[:2] == ['api', 'organizations'] and parts[3] == 'usage':
+            body = provider.fetch_usage(parts[2])
+        else:
+            self.send_error(404)
+            return
+
+        payload = json.dumps(body).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class UiDispatcher:
+    """Thread-safe queue of work for the Tk thread.
+    
+    Background threads post callbacks here instead of calling root.after
+    directly. Posts sharing a key are coalesced, so only the newest status
+    text or usage payload runs, in the queue slot of the first one. The
+    queue is drained on a Tk timer armed only from the Tk thread: every
+    UI_POLL_MIN_MS while work arrives, backing off to UI_POLL_MAX_MS while
+    idle. Each drain stops after UI_DRAIN_MAX_ITEMS callbacks or
+    UI_DRAIN_BUDGET seconds.
+    """
+
+    def __init__(self, root):
+        """Create the queue and arm its timer (call from the Tk thread)"""
+        self.root = root
+        self.lock = threading.Lock()
+        self.heap = []
+        self.pending = {}
+        self.seq = 0
+        self.poll_ms = UI_POLL_MIN_MS
+        
+        # Diagnostics
+        self.posted = 0
+        self.coalesced = 0
+        self.run = 0
+        self.max_depth = 0
+        self.last_latency = 0.0
+        self.max_latency = 0.0
+        
+        self.root.after(self.poll_ms, self.drain)
+
+    def post(self, key, callback, priority=PRIORITY_NORMAL):
+        """Queue `callback` for the Tk thread; key=None never coalesces"""
+        with self.lock:
+            self.seq += 1
+            self.posted += 1
+            if key is None:
+                key = ('unkeyed', self.seq)
+            
+            if key in self.pending:
+                posted_at = self.pending[key][1]
+                self.pending[key] = (callback, posted_at)
+                self.coalesced += 1
+            else:
+                self.pending[key] = (callback, time.monotonic())
+                heapq.heappush(self.heap, (priority, self.seq, key))
+                self.max_depth = max(self.max_depth, len(self.pending))
+
+    def drain(self):
+        deadline = time.monotonic() + UI_DRAIN_BUDGET
+        ran = 0
+        for _ in range(UI_DRAIN_MAX_ITEMS):
+            with self.lock:
+                if not self.heap:
+                    break
+                _, _, key = heapq.heappop(self.heap)
+                callback, posted_at = self.pending.pop(key)
+            
+            now = time.monotonic()
+            self.last_latency = now - posted_at
+            self.max_latency = max(self.max_latency, self.last_latency)
+            self.run += 1
+            ran += 1
+            try:
+                callback()
+            except Exception:
+                self.root.report_callback_exception(*sys.exc_info())
+            
+            if time.monotonic() > deadline:
+                break
+        
+        with self.lock:
+            backlog = bool(self.heap)
+        if backlog:
+            # Let Tk handle its own events before the next batch
+            delay = 1
+        elif ran:
+            self.poll_ms = UI_POLL_MIN_MS
+            delay = self.poll_ms
+        else:
+            self.poll_ms = min(self.poll_ms * 2, UI_POLL_MAX_MS)
+            delay = self.poll_ms
+        try:
+            self.root.after(delay, self.drain)
+        except tk.TclError:
+            # Window destroyed (shutting down)
+            pass
+
+    def stats(self):
+        with self.lock:
+            return {
+                'depth': len(self.pending),
+                'max_depth': self.max_depth,
+                'posted': self.posted,
+                'coalesced': self.coalesced,
+                'run': self.run,
+                'last_latency_ms': self.last_latency * 1000,
+                'max_latency_ms': self.max_latency * 1000,
+            }
+
+
+class Countdown:
+    """'Resets in' text for one window, recomputed only when it would change.
+    
+    Above an hour the text only shows minutes, so it changes once a minute;
+    in the final hour it shows seconds and changes every second.
+    """
+
+    __slots__ = ('resets_at', 'format_remaining', 'text', 'next_change')
+
+    def __init__(self, resets_at, format_remaining):
+        self.resets_at = resets_at
+        self.format_remaining = format_remaining
+        self.text = None
+        self.next_change = -math.inf
+
+    def update(self, now):
+        """Return the new text if it changed since the last call, else None"""
+        if now < self.next_change:
+            return None
+        
+        remaining = self.resets_at - now
+        if remaining > 0:
+            text = f"Resets in: {self.format_remaining(remaining)}"
+            # The text changes just after `remaining` crosses the next
+            # whole minute (or second)
+            step = 60 if remaining >= 3600 else 1
+            self.next_change = self.resets_at - step * math.floor(remaining / step) + 0.001
+        else:
+            text = "Resetting soon..."
+            self.next_change = math.inf
+        
+        if text == self.text:
+            return None
+        self.text = text
+        return text
+
+
+class Sparkline:
+    """Small utilization chart for the current usage window.
+
+    Samples are folded into a per-pixel min/max downsample as they arrive, so
+    adding a sample only redraws the one column it lands in and the chart
+    never has to look at the full history again.
+    """
+
+    def __init__(self, parent, window, color, width=64, height=14, bg='#1a1a1a'):
+        self.window = window
+        self.color = color
+        self.width = width
+        self.height = height
+        self.canvas = tk.Canvas(
+            parent,
+            width=width,
+            height=height,
+            bg=bg,
+            highlightthickness=0,
+            bd=0
+        )
+        self.window_end = None
+        self.mins = [None] * width
+        self.maxs = [None] * width
+        self.columns = [None] * width
+
+    def clear(self):
+        """Drop all columns, e.g. when a new usage window starts"""
+        self.canvas.delete('all')
+        self.mins = [None] * self.width
+        self.maxs = [None] * self.width
+        self.columns = [None] * self.width
+
+    def redraw(self, points):
+        """Start over from (timestamp, utilization, resets_at) points"""
+        self.window_end = None
+        self.clear()
+        for point in points:
+            self.add_sample(*point)
+
+    def add_sample(self, timestamp, utilization, resets_at):
+        """Fold one sample into the downsample and redraw its column"""
+        if resets_at is None:
+            return
+
+        # The API's reset time jitters slightly between fetches; only treat
+        # a real jump as the start of a new window
+        if self.window_end is None or abs(resets_at - self.window_end) > 60:
+            self.window_end = resets_at
+            self.clear()
+
+        x = int((timestamp - (self.window_end - self.window)) / self.window * self.width)
+        if x < 0 or x >= self.width:
+            return
+
+        lo, hi = self.mins[x], self.maxs[x]
+        if lo is not None and lo <= utilization <= hi:
+            return
+        self.mins[x] = utilization if lo is None else min(lo, utilization)
+        self.maxs[x] = utilization if hi is None else max(hi, utilization)
+        self.draw_column(x)
+
+    def draw_column(self, x):
+        scale = (self.height - 1) / 100
+        y_top = self.height - 1 - int(min(self.maxs[x], 100) * scale)
+        y_bottom = self.height - 1 - int(min(self.mins[x], 100) * scale)
+
+        if self.columns[x] is None:
+            self.columns[x] = self.canvas.create_line(
+                x, y_top, x, y_bottom + 1, fill=self.color
+            )
+        else:
+            self.canvas.coords(self.columns[x], x, y_top, x, y_bottom + 1)
+
+
+class UsageSection:
+    """Title, usage text, progress bar, countdown and (optionally) sparkline for one limit"""
+
+    def __init__(self, parent, title, color, window=None, separator=False):
+        self.color = color
+        self.countdown = None
+        self.frame = tk.Frame(parent, bg='#1a1a1a')
+        self.frame.pack(fill='x')
+        
+        if separator:
+            tk.Frame(self.frame, bg='#333333', height=1).pack(fill='x', pady=(10, 8))
+        
+        tk.Label(
+            self.frame,
+            text=title,
+            font=('Segoe UI', 8, 'bold'),
+            fg='#888888',
+            bg='#1a1a1a',
+            anchor='w'
+        ).pack(fill='x', pady=(0, 2))
+        
+        row = tk.Frame(self.frame, bg='#1a1a1a')
+        row.pack(fill='x', pady=(0, 2))
+        
+        self.usage_label = tk.Label(
+            row,
+            text="Loading...",
+            font=('Segoe UI', 9),
+            fg='#cccccc',
+            bg='#1a1a1a',
+            anchor='w'
+        )
+        self.usage_label.pack(side='left')
+        
+        # Utilization over the current window
+        self.sparkline = None
+        if window:
+            self.sparkline = Sparkline(row, window, color)
+            self.sparkline.canvas.pack(side='right')
+        
+        # Progress bar
+        progress_bg = tk.Frame(self.frame, bg='#2a2a2a', height=12)
+        progress_bg.pack(fill='x', pady=(0, 2))
+        progress_bg.pack_propagate(False)
+        
+        self.progress_fill = tk.Frame(progress_bg, bg=color, height=12)
+        self.progress_fill.place(x=0, y=0, relheight=1, width=0)
+        
+        self.reset_label = tk.Label(
+            self.frame,
+            text="Resets in: --",
+            font=('Segoe UI', 7),
+            fg='#666666',
+            bg='#1a1a1a',
+            anchor='w'
+        )
+        self.reset_label.pack(fill='x')
+
+    def show(self, window, format_remaining):
+        """Apply a freshly parsed UsageWindow (once per fetch)"""
+        utilization = window.utilization
+        self.usage_label.config(text=f"{utilization:.1f}% used")
+        self.progress_fill.place(width=int((utilization / 100) * 284))
+        
+        # Color based on usage
+        if utilization >= 90:
+            self.progress_fill.config(bg='#ff4444')
+        elif utilization >= 70:
+            self.progress_fill.config(bg='#ffaa44')
+        else:
+            self.progress_fill.config(bg=self.color)
+        
+        # The countdown label is then kept current by the tick
+        if window.resets_at:
+            self.countdown = Countdown(window.resets_at, format_remaining)
+        else:
+            self.countdown = None
+            if utilization == 0:
+                self.reset_label.config(text="No active period")
+            else:
+                self.reset_label.config(text="Reset time unavailable")
+
+    def show_error(self):
+        self.countdown = None
+        self.usage_label.config(text="Error displaying usage")
+
+    def destroy(self):
+        self.frame.destroy()
+
 
 class ClaudeUsageBar:
     def __init__(self):
@@ -15,14 +1486,29 @@ class ClaudeUsageBar:
         self.root.title("Claude Usage")
         self.root.attributes('-topmost', True)
         self.root.overrideredirect(True)
+        self.ui = UiDispatcher(self.root)
         
         # Paths
-        self.app_data_dir = Path(os.getenv('APPDATA')) / 'ClaudeUsageBar'
-        self.app_data_dir.mkdir(exist_ok=True)
+        self.app_data_dir = get_app_data_dir()
+        self.app_data_dir.mkdir(parents=True, exist_ok=True)
         self.config_file = self.app_data_dir / 'config.json'
+        self.samples = SampleRing(SAMPLE_RING_CAPACITY)
+        self.snapshot = SnapshotFile(self.app_data_dir / 'snapshot.bin')
         
-        # Load config
+        # Load config and credentials
         self.config = self.load_config()
+        self.history = UsageHistory(
+            self.app_data_dir / 'history.jsonl',
+            history_retention(self.config)
+        )
+        self.credentials = CredentialStore(self.app_data_dir)
+        if self.credentials.migrate_from_config(self.config):
+            self.save_config()
+        self.provider = make_provider(self.config, self.credentials)
+        
+        # Follow a collector when one is configured or already running here
+        self.local_collector = find_local_collector(self.app_data_dir)
+        self.collector_url = self.config.get('collector_url') or self.local_collector
         
         # State
         self.dragging = False
@@ -30,37 +1516,35 @@ class ClaudeUsageBar:
         self.drag_y = 0
         self.usage_data = None
         self.polling_active = True
+        self.poll_wakeup = threading.Event()
+        self.poll_thread = None
+        self.online = True
         self.driver = None
         self.login_in_progress = False
         self.settings_window = None
+        self.tick_job = None
+        self.tick_mode = None
+        self.usage_dirty = False
+        self.usage_windows = []
+        self.countdowns = []
+        self.sparklines_stale = True
+        self.window_hidden = False
+        self.window_obscured = False
         
         # Setup UI
         self.setup_ui()
         self.position_window()
+        self.setup_visibility_tracking()
+        self.load_history()
         
-        # Check if we have auth token
-        if not self.config.get('session_key'):
+        # Check if we have auth token (subscribers get usage from the collector)
+        if not self.provider.has_credentials() and not self.collector_url:
             self.root.after(500, self.show_login_dialog)
         else:
             self.start_polling()
         
     def load_config(self):
-        default = {
-            'position': {'x': 20, 'y': 80},
-            'opacity': 0.9,
-            'session_key': None,
-            'poll_interval': 60
-        }
-        
-        if self.config_file.exists():
-            try:
-                with open(self.config_file, 'r') as f:
-                    loaded = json.load(f)
-                    return {**default, **loaded}
-            except:
-                pass
-        
-        return default
+        return load_config_file(self.config_file)
     
     def save_config(self):
         with open(self.config_file, 'w') as f:
@@ -160,7 +1644,7 @@ class ClaudeUsageBar:
                 pass
         
         # If no session key, quit the app
-        if not self.config.get('session_key'):
+        if not self.credentials.session_key:
             self.root.quit()
     
     def automated_browser_login(self):
@@ -170,7 +1654,7 @@ class ClaudeUsageBar:
             try:
                 import undetected_chromedriver as uc
             except ImportError:
-                self.root.after(0, lambda: [
+                self.ui.post('login_status', lambda: [
                     self.status_label.config(
                         text="Installing undetected-chromedriver...",
                         fg='#ffaa44'
@@ -181,7 +1665,7 @@ class ClaudeUsageBar:
                 subprocess.check_call([sys.executable, "-m", "pip", "install", "undetected-chromedriver"])
                 import undetected_chromedriver as uc
             
-            self.root.after(0, lambda: self.status_label.config(
+            self.ui.post('login_status', lambda: self.status_label.config(
                 text="Starting browser (bypassing Cloudflare)...",
                 fg='#ffaa44'
             ))
@@ -193,7 +1677,7 @@ class ClaudeUsageBar:
             try:
                 self.driver = uc.Chrome(options=options, use_subprocess=True)
             except Exception as e:
-                self.root.after(0, lambda: [
+                self.ui.post('login_status', lambda e=e: [
                     self.status_label.config(
                         text=f"Browser error: {str(e)[:40]}",
                         fg='#ff4444'
@@ -204,7 +1688,7 @@ class ClaudeUsageBar:
                 return
             
             # Navigate to Claude
-            self.root.after(0, lambda: self.status_label.config(
+            self.ui.post('login_status', lambda: self.status_label.config(
                 text="Please log in to claude.ai in the browser...",
                 fg='#ffaa44'
             ))
@@ -256,29 +1740,23 @@ class ClaudeUsageBar:
                     self.driver = None
             
             if session_key:
-                # Success! Save session key AND all cookies
-                self.config['session_key'] = session_key
-                
-                # Save all cookies as a cookie string
-                if all_cookies:
-                    cookie_string = '; '.join([f"{c['name']}={c['value']}" for c in all_cookies])
-                    self.config['cookie_string'] = cookie_string
-                
-                self.save_config()
+                # Success! Save ALL cookies (sessionKey among them), encrypted
+                self.credentials.save({c['name']: c['value'] for c in all_cookies})
+                self.provider.refresh_auth()
                 
-                self.root.after(0, lambda: [
+                self.ui.post('login_status', lambda: [
                     self.status_label.config(text="✓ Login successful!", fg='#44ff44'),
                 ])
                 
                 # Close dialog and start polling
                 time.sleep(1)
-                self.root.after(0, lambda: [
+                self.ui.post('login_done', lambda: [
                     self.login_dialog.destroy() if hasattr(self, 'login_dialog') else None,
                     self.start_polling()
                 ])
             else:
                 # Timeout or closed
-                self.root.after(0, lambda: [
+                self.ui.post('login_status', lambda: [
                     self.status_label.config(text="Login cancelled or timeout. Try again.", fg='#ff4444'),
                     self.login_button.config(state='normal', text="Sign In")
                 ])
@@ -293,124 +1771,191 @@ class ClaudeUsageBar:
                     pass
                 self.driver = None
             
-            self.root.after(0, lambda: [
+            self.ui.post('login_status', lambda e=e: [
                 self.status_label.config(text=f"Error: {str(e)[:40]}", fg='#ff4444'),
                 self.login_button.config(state='normal', text="Sign In")
             ])
             self.login_in_progress = False
     
     def fetch_usage_data(self):
-        """Fetch usage data from Claude API using requests with cloudflare bypass"""
-        if not self.config.get('session_key'):
-            return None
-            
+        """Fetch usage data from the provider"""
         try:
-            # Use cloudscraper to bypass Cloudflare
-            try:
-                import cloudscraper
-            except ImportError:
-                import subprocess
-                import sys
-                subprocess.check_call([sys.executable, "-m", "pip", "install", "cloudscraper"])
-                import cloudscraper
-            
-            # Create a scraper that bypasses Cloudflare
-            scraper = cloudscraper.create_scraper(
-                browser={
-                    'browser': 'chrome',
-                    'platform': 'windows',
-                    'mobile': False
-                }
-            )
-            
-            # Use full cookie string if available
-            cookie_string = self.config.get('cookie_string', f'sessionKey={self.config["session_key"]}')
-            
-            headers = {
-                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
-                'Accept': 'application/json',
-                'Accept-Language': 'en-US,en;q=0.9',
-                'Referer': 'https://claude.ai/chats',
-                'Sec-Fetch-Dest': 'empty',
-                'Sec-Fetch-Mode': 'cors',
-                'Sec-Fetch-Site': 'same-origin',
-                'sec-ch-ua': '"Not_A Brand";v="8", "Chromium";v="120", "Google Chrome";v="120"',
-                'sec-ch-ua-mobile': '?0',
-                'sec-ch-ua-platform': '"Windows"',
-            }
-            
-            # Set cookies
-            for cookie_pair in cookie_string.split('; '):
-                if '=' in cookie_pair:
-                    name, value = cookie_pair.split('=', 1)
-                    scraper.cookies.set(name, value, domain='claude.ai')
-            
-            # Get organizations
-            response = scraper.get(
-                'https://claude.ai/api/organizations',
-                headers=headers,
-                timeout=15
-            )
-            
-            if response.status_code == 200:
-                orgs = response.json()
-                
-                if orgs and len(orgs) > 0:
-                    org_id = orgs[0].get('uuid')
-                    
-                    # Get usage
-                    usage_response = scraper.get(
-                        f'https://claude.ai/api/organizations/{org_id}/usage',
-                        headers=headers,
-                        timeout=15
-                    )
-                    
-                    if usage_response.status_code == 200:
-                        usage_data = usage_response.json()
-                        return usage_data
-            
-            elif response.status_code == 401:
-                self.root.after(0, self.handle_auth_error)
-                return None
-            
-            return None
-                
-        except Exception as e:
+            return self.provider.fetch_usage_data()
+        except AuthError:
+            self.ui.post('auth_error', self.handle_auth_error, PRIORITY_HIGH)
             return None
     
     def handle_auth_error(self):
         """Handle authentication errors"""
         if messagebox.askyesno("Session Expired", 
                                "Your session has expired. Would you like to log in again?"):
-            self.config['session_key'] = None
-            self.save_config()
+            self.credentials.clear()
+            self.provider.refresh_auth()
             self.show_login_dialog()
     
     def polling_loop(self):
-        """Background thread for polling API"""
+        """Background thread for polling API.
+        
+        Sleeps in short steps instead of a whole poll interval so it can
+        notice a suspend/resume (the clocks jump past the step) and fetch
+        right away. While the API host is unreachable it only runs a cheap
+        TCP probe, and it fetches as soon as the network comes back.
+        """
+        next_fetch = clock.monotonic()
+        
         while self.polling_active:
-            data = self.fetch_usage_data()
-            if data:
-                self.usage_data = data
-                self.root.after(0, self.update_progress)
+            if clock.monotonic() >= next_fetch:
+                if self.provider.is_reachable():
+                    self.online = True
+                    self.snapshot.set_online(True)
+                    data = self.fetch_usage_data()
+                    if data:
+                        self.handle_usage_data(data)
+                    next_fetch = clock.monotonic() + self.config['poll_interval']
+                else:
+                    self.online = False
+                    self.snapshot.set_online(False)
+                    next_fetch = clock.monotonic() + OFFLINE_PROBE_INTERVAL
+            
+            wall_before = clock.time()
+            mono_before = clock.monotonic()
+            step = min(POLL_STEP, max(0, next_fetch - mono_before))
+            woken = clock.wait(self.poll_wakeup, step)
+            self.poll_wakeup.clear()
+            
+            # Depending on the OS, the monotonic clock either stops during
+            # suspend (then only wall time jumps) or keeps counting (then the
+            # wait simply overshoots); either way, treat it as a resume
+            overshoot = max(clock.time() - wall_before, clock.monotonic() - mono_before) - step
+            if woken or overshoot > RESUME_THRESHOLD:
+                next_fetch = clock.monotonic()
+    
+    def subscribe_loop(self):
+        """Background thread following a LAN collector instead of polling the API"""
+        base_url = self.collector_url.rstrip('/')
+        last_time = self.history.last_timestamp() or 0
+        
+        while self.polling_active:
+            try:
+                # Catch up on samples recorded while we were away. On the
+                # collector's own machine the history file is shared and
+                # already has them, so check the file rather than last_time
+                for batch in iter_collector_history(base_url, last_time):
+                    recorded = self.history.last_timestamp() or 0
+                    self.history.append([sample for sample in batch if sample['t'] > recorded])
+                    last_time = batch[-1]['t']
+                    # Same priority as live samples, so the ring stays in time order
+                    self.ui.post(None, lambda batch=batch: [
+                        self.add_sample(sample) for sample in batch
+                    ])
+                
+                # Then follow live updates
+                for message in iter_collector_events(base_url):
+                    if not self.polling_active:
+                        return
+                    sample = message['sample']
+                    if sample['t'] > last_time:
+                        if sample['t'] > (self.history.last_timestamp() or 0):
+                            self.history.append([sample])
+                        last_time = sample['t']
+                        self.handle_usage_data(message['usage'], sample)
+                    else:
+                        # The latest usage sent on connect, already synced above
+                        windows = parse_usage(message['usage'])
+                        self.ui.post('usage', lambda message=message, windows=windows: self.show_usage(
+                            message['usage'], windows
+                        ))
+            except Exception:
+                pass
             
-            time.sleep(self.config['poll_interval'])
+            time.sleep(COLLECTOR_RETRY_DELAY)
     
     def start_polling(self):
-        """Start background polling thread"""
+        """Start background polling thread (or wake it, e.g. after logging in again)"""
         self.polling_active = True
-        poll_thread = threading.Thread(target=self.polling_loop, daemon=True)
-        poll_thread.start()
+        if self.poll_thread and self.poll_thread.is_alive():
+            self.poll_wakeup.set()
+            return
         
-        # Initial fetch
-        def initial_fetch():
-            time.sleep(0.5)
-            data = self.fetch_usage_data()
-            if data:
-                self.usage_data = data
-                self.root.after(0, self.update_progress)
+        if self.collector_url:
+            # The collector sends its latest usage as soon as we connect
+            self.poll_thread = threading.Thread(target=self.subscribe_loop, daemon=True)
+            self.poll_thread.start()
+            return
+        
+        # The poller fetches immediately on its first pass
+        self.poll_thread = threading.Thread(target=self.polling_loop, daemon=True)
+        self.poll_thread.start()
+    
+    def handle_usage_data(self, data, sample=None):
+        """Record fresh usage and queue it for the UI (poller/subscriber thread).
+        
+        Recording here stamps the sample with the fetch time and gets it into
+        the history and snapshot even when renders coalesce. Samples that
+        arrive with the data were already recorded by the collector and
+        synced by the subscriber thread; a collector on this machine also
+        writes the snapshot itself, so it is left to it.
+        """
+        # Parsed once per fetch; history, snapshot and UI all use the result
+        windows = parse_usage(data)
+        if sample is None:
+            sample = self.history.record(windows)
+            self.snapshot.publish(sample, self.config['poll_interval'])
+        elif not self.local_collector:
+            self.snapshot.publish(sample, self.config['poll_interval'])
+        
+        # Every sample reaches the ring, in order; only the newest payload renders
+        self.ui.post(None, lambda: self.add_sample(sample))
+        self.ui.post('usage', lambda: self.show_usage(data, windows))
+    
+    def show_usage(self, data, windows):
+        """Store the newest usage and refresh the UI (Tk thread)"""
+        self.usage_data = data
+        self.usage_windows = windows
+        self.usage_dirty = True
+        self.request_render()
+    
+    def add_sample(self, sample):
+        """Keep a sample in memory and fold it into the sparklines.
+        
+        While the sparklines can't be seen (or before the first render) the
+        sample only goes into the ring, and the next render redraws them
+        from it.
+        """
+        self.samples.append(sample)
+        if self.sparklines_stale or not self.can_be_seen():
+            self.sparklines_stale = True
+            return
+        for key in CORE_LIMITS:
+            self.sections[key].sparkline.add_sample(
+                sample['t'], sample[key], sample[f'{key}_resets_at']
+            )
+    
+    def redraw_sparklines(self):
+        """Redraw each sparkline from the ring samples in its current window"""
+        self.sparklines_stale = False
+        if not len(self.samples):
+            return
         
-        threading.Thread(target=initial_fetch, daemon=True).start()
+        latest = self.samples[-1]
+        for key in CORE_LIMITS:
+            sparkline = self.sections[key].sparkline
+            resets_key = f'{key}_resets_at'
+            resets_at = getattr(latest, resets_key)
+            since = resets_at - sparkline.window if resets_at else latest.t
+            sparkline.redraw(
+                (view.t, getattr(view, key), getattr(view, resets_key))
+                for view in self.samples.iter_since(since)
+            )
+    
+    def load_history(self):
+        """Load the last week of recorded history (once, at startup; seeks, doesn't scan)"""
+        since = clock.time() - SEVEN_DAY_WINDOW
+        try:
+            for sample in self.history.iter_samples(since=since):
+                self.add_sample(sample)
+        except:
+            pass
     
     def format_time_remaining(self, time_left_seconds):
         """Format time remaining in a clear, readable way"""
@@ -510,93 +2055,39 @@ class ClaudeUsageBar:
         self.close_btn.bind('<Enter>', lambda e: self.close_btn.config(fg='#ff4444'))
         self.close_btn.bind('<Leave>', lambda e: self.close_btn.config(fg='#888888'))
         
-        # Content
-        content = tk.Frame(self.main_frame, bg='#1a1a1a')
-        content.pack(fill='x', padx=8, pady=8)
-        
-        # 5-Hour Usage section
-        tk.Label(
-            content,
-            text="5-Hour Limit",
-            font=('Segoe UI', 8, 'bold'),
-            fg='#888888',
-            bg='#1a1a1a',
-            anchor='w'
-        ).pack(fill='x', pady=(0, 2))
-        
-        self.five_hour_usage_label = tk.Label(
-            content,
-            text="Loading...",
-            font=('Segoe UI', 9),
-            fg='#cccccc',
-            bg='#1a1a1a',
-            anchor='w'
-        )
-        self.five_hour_usage_label.pack(fill='x', pady=(0, 2))
-        
-        # 5-Hour Progress bar
-        five_hour_progress_bg = tk.Frame(content, bg='#2a2a2a', height=12)
-        five_hour_progress_bg.pack(fill='x', pady=(0, 2))
-        five_hour_progress_bg.pack_propagate(False)
-        
-        self.five_hour_progress_fill = tk.Frame(five_hour_progress_bg, bg='#CC785C', height=12)
-        self.five_hour_progress_fill.place(x=0, y=0, relheight=1, width=0)
-        
-        self.five_hour_reset_label = tk.Label(
-            content,
-            text="Resets in: --",
-            font=('Segoe UI', 7),
-            fg='#666666',
-            bg='#1a1a1a',
-            anchor='w'
-        )
-        self.five_hour_reset_label.pack(fill='x', pady=(0, 10))
-        
-        # Separator
-        separator = tk.Frame(content, bg='#333333', height=1)
-        separator.pack(fill='x', pady=(0, 8))
-        
-        # Weekly Usage section
-        tk.Label(
-            content,
-            text="Weekly Limit",
-            font=('Segoe UI', 8, 'bold'),
-            fg='#888888',
-            bg='#1a1a1a',
-            anchor='w'
-        ).pack(fill='x', pady=(0, 2))
-        
-        self.weekly_usage_label = tk.Label(
-            content,
-            text="Loading...",
-            font=('Segoe UI', 9),
-            fg='#cccccc',
-            bg='#1a1a1a',
-            anchor='w'
-        )
-        self.weekly_usage_label.pack(fill='x', pady=(0, 2))
-        
-        # Weekly Progress bar
-        weekly_progress_bg = tk.Frame(content, bg='#2a2a2a', height=12)
-        weekly_progress_bg.pack(fill='x', pady=(0, 2))
-        weekly_progress_bg.pack_propagate(False)
+        # Content: one section per usage limit, more are added as the API reports them
+        self.content = tk.Frame(self.main_frame, bg='#1a1a1a')
+        self.content.pack(fill='x', padx=8, pady=8)
         
-        self.weekly_progress_fill = tk.Frame(weekly_progress_bg, bg='#8B6BB7', height=12)
-        self.weekly_progress_fill.place(x=0, y=0, relheight=1, width=0)
-        
-        self.weekly_reset_label = tk.Label(
-            content,
-            text="Resets in: --",
-            font=('Segoe UI', 7),
-            fg='#666666',
-            bg='#1a1a1a',
-            anchor='w'
-        )
-        self.weekly_reset_label.pack(fill='x')
+        self.sections = {}
+        for key in CORE_LIMITS:
+            self.add_usage_section(key)
         
         # Set opacity
         self.root.attributes('-alpha', self.config['opacity'])
-        self.root.geometry('300x240')
+        self.fit_window()
+    
+    def add_usage_section(self, key):
+        if key in LIMIT_COLORS:
+            color = LIMIT_COLORS[key]
+        else:
+            extras = len(self.sections) - len(CORE_LIMITS)
+            color = EXTRA_LIMIT_COLORS[extras % len(EXTRA_LIMIT_COLORS)]
+        
+        # Only the core limits are recorded in history, so only they get sparklines
+        window = {'five_hour': FIVE_HOUR_WINDOW, 'seven_day': SEVEN_DAY_WINDOW}.get(key)
+        self.sections[key] = UsageSection(
+            self.content,
+            limit_title(key),
+            color,
+            window=window,
+            separator=bool(self.sections)
+        )
+    
+    def fit_window(self):
+        """Resize the window height to fit its sections, keeping its position"""
+        self.root.update_idletasks()
+        self.root.geometry(f'300x{self.main_frame.winfo_reqheight() + 2}')
     
     def start_drag(self, event):
         self.dragging = True
@@ -623,112 +2114,163 @@ class ClaudeUsageBar:
         self.root.geometry(f'+{x}+{y}')
     
     def update_progress(self):
-        """Update UI with latest usage data"""
+        """Update UI with latest usage data (once per fetch; countdowns tick separately)"""
         if not self.usage_data:
             return
         
-        try:
+        # Core limits always show; any other bucket gets its own section
+        # for as long as the API reports it
+        present = {window.key: window for window in self.usage_windows}
+        windows = [present.get(key) or UsageWindow(key, 0.0, None) for key in CORE_LIMITS]
+        windows += [window for window in self.usage_windows if window.key not in CORE_LIMITS]
+        
+        layout_changed = False
+        for key in list(self.sections):
+            if key not in CORE_LIMITS and key not in present:
+                self.sections.pop(key).destroy()
+                layout_changed = True
+        
+        self.countdowns = []
+        for window in windows:
+            if window.key not in self.sections:
+                self.add_usage_section(window.key)
+                layout_changed = True
+            section = self.sections[window.key]
             try:
-                from dateutil import parser as date_parser
-            except ImportError:
-                import subprocess
-                subprocess.check_call([sys.executable, "-m", "pip", "install", "python-dateutil"])
-                from dateutil import parser as date_parser
-            
-            # Extract 5-hour usage
-            five_hour = self.usage_data.get('five_hour', {})
-            five_hour_utilization = five_hour.get('utilization', 0.0)
-            five_hour_resets_at = five_hour.get('resets_at')
-            
-            # Display 5-hour usage
-            self.five_hour_usage_label.config(text=f"{five_hour_utilization:.1f}% used")
-            
-            # Update 5-hour progress bar
-            bar_width = int((five_hour_utilization / 100) * 284)
-            self.five_hour_progress_fill.place(width=bar_width)
-            
-            # Color based on usage for 5-hour
-            if five_hour_utilization >= 90:
-                self.five_hour_progress_fill.config(bg='#ff4444')
-            elif five_hour_utilization >= 70:
-                self.five_hour_progress_fill.config(bg='#ffaa44')
-            else:
-                self.five_hour_progress_fill.config(bg='#CC785C')
-            
-            # Update 5-hour reset timer
-            if five_hour_resets_at:
-                try:
-                    reset_time = date_parser.parse(five_hour_resets_at)
-                    now = datetime.now(reset_time.tzinfo)
-                    time_left = reset_time - now
-                    
-                    if time_left.total_seconds() > 0:
-                        time_str = self.format_time_remaining(time_left.total_seconds())
-                        self.five_hour_reset_label.config(text=f"Resets in: {time_str}")
-                    else:
-                        self.five_hour_reset_label.config(text="Resetting soon...")
-                except:
-                    self.five_hour_reset_label.config(text="Reset time error")
-            else:
-                if five_hour_utilization == 0:
-                    self.five_hour_reset_label.config(text="No active period")
-                else:
-                    self.five_hour_reset_label.config(text="Reset time unavailable")
-            
-            # Extract weekly usage (note: API uses 'seven_day' not 'weekly')
-            weekly = self.usage_data.get('seven_day', {})
-            weekly_utilization = weekly.get('utilization', 0.0)
-            weekly_resets_at = weekly.get('resets_at')
-            
-            # Display weekly usage
-            self.weekly_usage_label.config(text=f"{weekly_utilization:.1f}% used")
-            
-            # Update weekly progress bar
-            weekly_bar_width = int((weekly_utilization / 100) * 284)
-            self.weekly_progress_fill.place(width=weekly_bar_width)
-            
-            # Color based on usage for weekly
-            if weekly_utilization >= 90:
-                self.weekly_progress_fill.config(bg='#ff4444')
-            elif weekly_utilization >= 70:
-                self.weekly_progress_fill.config(bg='#ffaa44')
-            else:
-                self.weekly_progress_fill.config(bg='#8B6BB7')
-            
-            # Update weekly reset timer
-            if weekly_resets_at:
-                try:
-                    reset_time = date_parser.parse(weekly_resets_at)
-                    now = datetime.now(reset_time.tzinfo)
-                    time_left = reset_time - now
-                    
-                    if time_left.total_seconds() > 0:
-                        time_str = self.format_time_remaining(time_left.total_seconds())
-                        self.weekly_reset_label.config(text=f"Resets in: {time_str}")
-                    else:
-                        self.weekly_reset_label.config(text="Resetting soon...")
-                except:
-                    self.weekly_reset_label.config(text="Reset time error")
-            else:
-                if weekly_utilization == 0:
-                    self.weekly_reset_label.config(text="No active period")
-                else:
-                    self.weekly_reset_label.config(text="Reset time unavailable")
-                
-        except Exception as e:
-            self.five_hour_usage_label.config(text="Error displaying usage")
-            self.weekly_usage_label.config(text="Error displaying usage")
+                section.show(window, self.format_time_remaining)
+            except Exception:
+                section.show_error()
+            if section.countdown:
+                self.countdowns.append((section.countdown, section.reset_label))
+        
+        if layout_changed:
+            self.fit_window()
+    
+    def update_countdowns(self, now):
+        """Refresh countdown labels whose text changed; returns the next change time"""
+        next_change = math.inf
+        for countdown, label in self.countdowns:
+            text = countdown.update(now)
+            if text is not None:
+                label.config(text=text)
+            next_change = min(next_change, countdown.next_change)
+        return next_change
+    
+    def setup_visibility_tracking(self):
+        """Follow whether anyone can see the overlay, to throttle rendering.
+        
+        Map/Unmap and Visibility events cover minimized, hidden and fully
+        covered windows on X11. Tk on Windows sends no Visibility events and
+        this override-redirect window is never iconified or unmapped there, so
+        on Windows only virtual desktop switches are detected (through DWM
+        cloaking, see can_be_seen); a covered overlay keeps rendering.
+        """
+        self.root.bind('<Map>', self.on_map_change, add='+')
+        self.root.bind('<Unmap>', self.on_map_change, add='+')
+        self.root.bind('<Visibility>', self.on_visibility_change, add='+')
+        self.root.bind('<FocusIn>', self.on_user_activity, add='+')
+        self.root.bind('<Enter>', self.on_user_activity, add='+')
+    
+    def on_map_change(self, event):
+        # Child widgets share the root's bindings; only the window itself counts
+        if event.widget is not self.root:
+            return
+        self.window_hidden = event.type == tk.EventType.Unmap
+        if not self.window_hidden:
+            self.catch_up()
+    
+    def on_visibility_change(self, event):
+        if event.widget is not self.root:
+            return
+        self.window_obscured = event.state == 'VisibilityFullyObscured'
+        if not self.window_obscured:
+            self.catch_up()
+    
+    def on_user_activity(self, event=None):
+        self.catch_up()
+    
+    def can_be_seen(self):
+        if self.window_hidden or self.window_obscured or window_cloaked(self.root):
+            return False
+        try:
+            return bool(self.root.winfo_viewable()) and self.root.state() != 'iconic'
+        except tk.TclError:
+            return False
+    
+    def user_is_idle(self):
+        """True when there has been no keyboard/mouse input for a while"""
+        try:
+            # -1 where the platform can't tell, which counts as active
+            return int(self.root.tk.call('tk', 'inactive')) >= IDLE_AFTER_MS
+        except (tk.TclError, ValueError):
+            return False
+    
+    def tick(self):
+        """Render what changed and sleep until the next visible change.
+        
+        The next wakeup is when a countdown label's text would change
+        (about once a minute, every second only in the final hour), no
+        sooner than IDLE_TICK_MS while the user is away. Stops entirely
+        while the window can't be seen; Map/Visibility/focus events restart
+        it with a single catch-up render. On Windows it instead re-checks
+        every CLOAKED_RECHECK_MS, since nothing announces the overlay's
+        virtual desktop becoming active again.
+        """
+        self.tick_job = None
+        if not self.can_be_seen():
+            self.tick_mode = None
+            if sys.platform == 'win32':
+                self.tick_job = self.root.after(CLOAKED_RECHECK_MS, self.tick)
+            return
         
-        # Schedule next update
-        self.root.after(1000, self.update_progress)
+        if self.usage_dirty:
+            self.usage_dirty = False
+            self.update_progress()
+        if self.sparklines_stale:
+            self.redraw_sparklines()
+        
+        now = clock.time()
+        next_change = self.update_countdowns(now)
+        idle = self.user_is_idle()
+        self.tick_mode = 'idle' if idle else 'live'
+        if next_change == math.inf:
+            return
+        
+        delay = math.ceil(clock.to_real(next_change - now) * 1000)
+        if idle:
+            delay = max(delay, IDLE_TICK_MS)
+        self.tick_job = self.root.after(max(delay, 1), self.tick)
+    
+    def catch_up(self):
+        """Bring the display up to date after being hidden or idle"""
+        if self.tick_mode != 'live':
+            self.request_render()
+    
+    def request_render(self):
+        """Render now (if visible) and restart the tick chain from here"""
+        if self.tick_job:
+            self.root.after_cancel(self.tick_job)
+            self.tick_job = None
+        self.tick()
     
     def manual_refresh(self, event=None):
         """Manually trigger refresh"""
+        if self.collector_url:
+            # The subscriber already gets every update the moment the
+            # collector publishes it; fetching here would only re-record
+            # the collector's cached usage as new
+            self.request_render()
+            return
+        
+        if self.poll_thread and self.poll_thread.is_alive():
+            # Let the poller fetch now (and reschedule) rather than racing it
+            self.poll_wakeup.set()
+            return
+        
         def refresh():
             data = self.fetch_usage_data()
             if data:
-                self.usage_data = data
-                self.root.after(0, self.update_progress)
+                self.handle_usage_data(data)
         
         threading.Thread(target=refresh, daemon=True).start()
     
@@ -756,7 +2298,7 @@ class ClaudeUsageBar:
         ).pack(pady=(20, 5))
         
         # Show session key snippet
-        session_key = self.config.get('session_key', 'Not logged in')
+        session_key = self.credentials.session_key or 'Not logged in'
         display_key = f"{session_key[:15]}..." if len(session_key) > 15 else session_key
         
         tk.Label(
@@ -925,9 +2467,7 @@ class ClaudeUsageBar:
         # Logout
         def logout():
             if messagebox.askyesno("Logout", "Log out and clear session?", parent=self.settings_window):
-                self.config['session_key'] = None
-                self.config['cookie_string'] = None
-                self.save_config()
+                self.credentials.clear()
                 self.close_settings()
                 messagebox.showinfo("Logged Out", "Please restart the app to log in again.")
                 self.root.quit()
@@ -956,8 +2496,18 @@ class ClaudeUsageBar:
                 pass
             self.settings_window = None
     
+    def diagnostics(self):
+        """Runtime counters for the soak test and troubleshooting"""
+        return {
+            'threads': threading.active_count(),
+            'online': self.online,
+            'tick_mode': self.tick_mode,
+            'ui_queue': self.ui.stats(),
+        }
+    
     def on_close(self, event=None):
         self.polling_active = False
+        self.poll_wakeup.set()
         if self.driver:
             try:
                 self.driver.quit()
@@ -968,6 +2518,485 @@ class ClaudeUsageBar:
     def run(self):
         self.root.mainloop()
 
-if __name__ == '__main__':
+# ---------------------------------------------------------------------------
+# Command line: history export
+# ---------------------------------------------------------------------------
+
+EXPORT_FIELDS = ['t', 'five_hour', 'seven_day', 'five_hour_resets_at', 'seven_day_resets_at']
+ROLLUP_FIELDS = ['t', 'samples', 'five_hour_avg', 'five_hour_max', 'seven_day_avg', 'seven_day_max']
+DURATION_UNITS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400, 'w': 7 * 86400}
+
+
+def parse_duration(text):
+    """Parse '90', '30s', '5m', '1h', '1d' or '1w' into seconds"""
+    text = text.strip().lower()
+    if text and text[-1] in DURATION_UNITS:
+        seconds = float(text[:-1]) * DURATION_UNITS[text[-1]]
+    else:
+        seconds = float(text)
+    if seconds <= 0:
+        raise argparse.ArgumentTypeError(f"duration must be positive: {text}")
+    return seconds
+
+
+def parse_time_arg(text):
+    """Parse an epoch number or an ISO 8601 date/time into epoch seconds"""
+    try:
+        return float(text)
+    except ValueError:
+        pass
+
+    try:
+        from dateutil import parser as date_parser
+    except ImportError:
+        import subprocess
+        subprocess.check_call([sys.executable, "-m", "pip", "install", "python-dateutil"])
+        from dateutil import parser as date_parser
+
+    try:
+        return date_parser.parse(text).timestamp()
+    except (ValueError, OverflowError):
+        raise argparse.ArgumentTypeError(f"invalid time: {text}")
+
+
+def merge_histories(paths, since=None, until=None):
+    """Stream samples from several history files merged by timestamp.
+
+    Each file is already in time order (it is only ever appended to), so a
+    k-way merge keeps one pending sample per file in memory.
+    """
+    streams = [UsageHistory(path).iter_samples(since, until) for path in paths]
+    return heapq.merge(*streams, key=lambda sample: sample['t'])
+
+
+def rollup_samples(samples, granularity):
+    """Aggregate a time-ordered sample stream into fixed-width buckets"""
+    bucket = None
+    count = 0
+    five_hour_sum = five_hour_max = 0.0
+    seven_day_sum = seven_day_max = 0.0
+
+    for sample in samples:
+        start = sample['t'] // granularity * granularity
+        if start != bucket:
+            if count:
+                yield {
+                    't': bucket,
+                    'samples': count,
+                    'five_hour_avg': round(five_hour_sum / count, 3),
+                    'five_hour_max': five_hour_max,
+                    'seven_day_avg': round(seven_day_sum / count, 3),
+                    'seven_day_max': seven_day_max,
+                }
+            bucket = start
+            count = 0
+            five_hour_sum = five_hour_max = 0.0
+            seven_day_sum = seven_day_max = 0.0
+
+        count += 1
+        five_hour_sum += sample['five_hour']
+        seven_day_sum += sample['seven_day']
+        five_hour_max = max(five_hour_max, sample['five_hour'])
+        seven_day_max = max(seven_day_max, sample['seven_day'])
+
+    if count:
+        yield {
+            't': bucket,
+            'samples': count,
+            'five_hour_avg': round(five_hour_sum / count, 3),
+            'five_hour_max': five_hour_max,
+            'seven_day_avg': round(seven_day_sum / count, 3),
+            'seven_day_max': seven_day_max,
+        }
+
+
+def write_csv(rows, fields, out):
+    writer = csv.DictWriter(out, fieldnames=fields, extrasaction='ignore', lineterminator='\n')
+    writer.writeheader()
+    for row in rows:
+        writer.writerow(row)
+
+
+def write_jsonl(rows, fields, out):
+    for row in rows:
+        out.write(json.dumps({field: row.get(field) for field in fields}, separators=(',', ':')))
+        out.write('\n')
+
+
+def write_parquet(rows, fields, path, batch_size=65536):
+    """Write rows as Parquet, one row group per batch so memory stays bounded"""
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        import subprocess
+        subprocess.check_call([sys.executable, "-m", "pip", "install", "pyarrow"])
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+    schema = pa.schema([
+        (field, pa.int64() if field == 'samples' else pa.float64())
+        for field in fields
+    ])
+    columns = {field: [] for field in fields}
+    pending = 0
+
+    with pq.ParquetWriter(path, schema) as writer:
+        for row in rows:
+            for field in fields:
+                columns[field].append(row.get(field))
+            pending += 1
+            if pending >= batch_size:
+                writer.write_table(pa.table(columns, schema=schema))
+                columns = {field: [] for field in fields}
+                pending = 0
+        if pending:
+            writer.write_table(pa.table(columns, schema=schema))
+
+
+def run_export(args):
+    """Export recorded samples as CSV, JSON Lines or Parquet"""
+    paths = args.inputs or [get_app_data_dir() / 'history.jsonl']
+    missing = [str(path) for path in paths if not Path(path).exists()]
+    if missing:
+        print(f"History file not found: {', '.join(missing)}", file=sys.stderr)
+        return 1
+
+    rows = merge_histories(paths, args.since, args.until)
+    fields = EXPORT_FIELDS
+    if args.rollup:
+        rows = rollup_samples(rows, args.rollup)
+        fields = ROLLUP_FIELDS
+
+    if args.format == 'parquet':
+        if args.output == '-':
+            print("Parquet export needs an output file (-o)", file=sys.stderr)
+            return 1
+        write_parquet(rows, fields, args.output)
+        return 0
+
+    writer = write_csv if args.format == 'csv' else write_jsonl
+    if args.output == '-':
+        writer(rows, fields, sys.stdout)
+    else:
+        with open(args.output, 'w', newline='') as out:
+            writer(rows, fields, out)
+    return 0
+
+
+def run_collector(args):
+    """Poll the usage API for the whole LAN and serve it to subscribers"""
+    app_data_dir = get_app_data_dir()
+    app_data_dir.mkdir(parents=True, exist_ok=True)
+    config = load_config_file(app_data_dir / 'config.json')
+    credentials = CredentialStore(app_data_dir)
+    if credentials.migrate_from_config(config):
+        with open(app_data_dir / 'config.json', 'w') as f:
+            json.dump(config, f, indent=2)
+    provider = make_provider(config, credentials)
+    if not provider.has_credentials():
+        print("No session key; sign in with the overlay first", file=sys.stderr)
+        return 1
+
+    collector = UsageCollector(
+        config,
+        provider,
+        UsageHistory(app_data_dir / 'history.jsonl', history_retention(config)),
+        SnapshotFile(app_data_dir / 'snapshot.bin')
+    )
+    try:
+        collector.serve_forever(args.host, args.port, app_data_dir / 'collector.json')
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+def run_memory_benchmark(args):
+    """Compare history sample footprints and watch RSS over a simulated run"""
+    import tracemalloc
+
+    interval = args.interval
+    total = int(args.days * 86400 / interval)
+    start = time.time()
+
+    def simulated_sample(i):
+        t = start + i * interval
+        return {
+            't': t,
+            'five_hour': (i * 7) % 1000 / 10,
+            'seven_day': (i * 3) % 1000 / 10,
+            'five_hour_resets_at': t - t % FIVE_HOUR_WINDOW + FIVE_HOUR_WINDOW,
+            'seven_day_resets_at': t - t % SEVEN_DAY_WINDOW + SEVEN_DAY_WINDOW,
+        }
+
+    def payload(i):
+        # What keeping raw parsed API payloads would look like
+        sample = simulated_sample(i)
+        return {
+            'five_hour': {
+                'utilization': sample['five_hour'],
+                'resets_at': datetime.fromtimestamp(sample['five_hour_resets_at']).isoformat() + '+00:00',
+            },
+            'seven_day': {
+                'utilization': sample['seven_day'],
+                'resets_at': datetime.fromtimestamp(sample['seven_day_resets_at']).isoformat() + '+00:00',
+            },
+        }
+
+    # Per-sample cost of each representation
+    probe = 10000
+    tracemalloc.start()
+    for name, build in [('parsed payload dicts', payload), ('flat sample dicts', simulated_sample)]:
+        before = tracemalloc.get_traced_memory()[0]
+        kept = [build(i) for i in range(probe)]
+        used = tracemalloc.get_traced_memory()[0] - before
+        print(f"{name:>22}: {used / probe:7.1f} bytes/sample")
+        del kept
+    tracemalloc.stop()
+
+    ring = SampleRing(args.capacity)
+    print(f"{'SampleRing':>22}: {ring.nbytes() / ring.capacity:7.1f} bytes/sample "
+          f"({ring.nbytes() / 1024:.0f} KiB for {ring.capacity} samples)")
+
+    # Steady-state RSS: the ring is preallocated, so after warm-up RSS
+    # should not move however long we keep recording
+    per_day = int(86400 / interval)
+    rss_log = []
+    print(f"\nSimulating {args.days:g} days at {interval:g} s ({total} samples)")
+    for i in range(total):
+        ring.append(simulated_sample(i))
+        if (i + 1) % per_day == 0:
+            rss = current_rss()
+            rss_log.append(rss)
+            rss_text = f"{rss / 1048576:.1f} MiB" if rss else "unavailable"
+            print(f"  day {(i + 1) // per_day:3d}: {len(ring):7d} samples kept, RSS {rss_text}")
+
+    rss_log = [rss for rss in rss_log if rss]
+    if len(rss_log) < 2:
+        return 0
+    growth = rss_log[-1] - rss_log[0]
+    print(f"\nRSS change after day 1: {growth / 1024:+.0f} KiB")
+    if growth > args.max_growth * 1024:
+        print(f"RSS grew more than {args.max_growth} KiB", file=sys.stderr)
+        return 1
+    return 0
+
+
+def run_snapshot(args):
+    """Print the latest snapshot, e.g. for a shell prompt"""
+    snapshot = read_snapshot(args.path)
+    if snapshot is None:
+        return 1
+    print(format_snapshot(snapshot, args.format, args.stale_suffix))
+    return 0
+
+
+def start_virtual_display():
+    """Start Xvfb if there is no display to draw on; returns the process or None"""
+    if sys.platform == 'win32' or os.getenv('DISPLAY'):
+        return None
+
+    import subprocess
+    if not shutil.which('Xvfb'):
+        raise RuntimeError("No DISPLAY set and Xvfb is not installed")
+
+    number = 90 + os.getpid() % 100
+    process = subprocess.Popen(
+        ['Xvfb', f':{number}', '-screen', '0', '1280x800x24', '-nolisten', 'tcp'],
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL
+    )
+    os.environ['DISPLAY'] = f':{number}'
+
+    socket_path = Path(f'/tmp/.X11-unix/X{number}')
+    deadline = time.monotonic() + 10
+    while not socket_path.exists():
+        if process.poll() is not None or time.monotonic() > deadline:
+            process.kill()
+            raise RuntimeError("Xvfb did not start")
+        time.sleep(0.05)
+    return process
+
+
+def grew_unbounded(values, slack):
+    """True if the last quarter of a series rises above its warmed-up second quarter"""
+    quarter = len(values) // 4
+    if quarter == 0:
+        return False
+    warmed_up = max(values[quarter:2 * quarter])
+    return max(values[3 * quarter:]) > warmed_up + slack
+
+
+def run_soak(args):
+    """Run the overlay for days of virtual time and check resource use stays flat"""
+    global clock
+    import tempfile
+
+    try:
+        display = start_virtual_display()
+    except RuntimeError as e:
+        print(f"Soak test needs a display: {e}", file=sys.stderr)
+        return 2
+
+    clock = VirtualClock(args.speed)
+
+    # Local stand-in for claude.ai, so the real request path is exercised
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StandInApiHandler)
+    server.daemon_threads = True
+    fake_config = {}
+    if args.curves:
+        with open(args.curves) as f:
+            fake_config['fake_curves'] = json.load(f)
+    server.provider = fake_provider_from_config(fake_config)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    data_dir = Path(tempfile.mkdtemp(prefix='claude-usage-soak-'))
+    os.environ['APPDATA'] = str(data_dir)
+    (data_dir / 'ClaudeUsageBar').mkdir()
+    with open(data_dir / 'ClaudeUsageBar' / 'config.json', 'w') as f:
+        json.dump({
+            'session_key': 'soak-test',
+            'api_base': f'http://127.0.0.1:{server.server_port}',
+            'poll_interval': args.poll_interval,
+        }, f)
+
     app = ClaudeUsageBar()
-    app.run()
\ No newline at end of file
+
+    # Time every render tick
+    tick_times = []
+    untimed_tick = app.tick
+
+    def timed_tick():
+        started = time.perf_counter()
+        untimed_tick()
+        tick_times.append(time.perf_counter() - started)
+
+    app.tick = timed_tick
+
+    rows = []
+    duration = args.days * 86400
+    next_sample = args.sample_every
+    print(f"Soaking {args.days:g} virtual days at {args.speed:g}x "
+          f"(~{duration / args.speed:.0f} s real)")
+    print(f"{'hour':>6} {'RSS MiB':>8} {'threads':>8} {'after':>6} {'tick ms':>8} "
+          f"{'queue':>6} {'queue ms':>8} {'fetches':>8}")
+
+    def measure():
+        nonlocal next_sample
+        if clock.elapsed() >= next_sample:
+            tick_ms = max(tick_times) * 1000 if tick_times else 0.0
+            tick_times.clear()
+            diagnostics = app.diagnostics()
+            row = {
+                'rss': (current_rss() or 0) / 1048576,
+                'threads': diagnostics['threads'],
+                'after': len(app.root.tk.splitlist(app.root.tk.call('after', 'info'))),
+                'tick_ms': tick_ms,
+                'queue': diagnostics['ui_queue']['depth'],
+                'queue_ms': diagnostics['ui_queue']['last_latency_ms'],
+            }
+            rows.append(row)
+            print(f"{next_sample / 3600:6.0f} {row['rss']:8.1f} {row['threads']:8d} "
+                  f"{row['after']:6d} {row['tick_ms']:8.2f} {row['queue']:6d} "
+                  f"{row['queue_ms']:8.2f} {server.provider.requests // 2:8d}")
+            next_sample += args.sample_every
+        if clock.elapsed() >= duration:
+            app.root.quit()
+            return
+        app.root.after(50, measure)
+
+    # The real main loop, so background threads can post to Tk as they do
+    # in normal use (Tk calls from other threads need it running)
+    app.root.after(50, measure)
+    try:
+        app.run()
+    finally:
+        app.on_close()
+        app.root.destroy()
+        server.shutdown()
+        shutil.rmtree(data_dir, ignore_errors=True)
+        if display:
+            display.terminate()
+
+    limits = {
+        'rss': args.max_rss_growth,
+        'threads': 2,
+        'after': 2,
+        'tick_ms': args.max_tick_growth,
+        'queue': 5,
+    }
+    failed = [
+        name for name, slack in limits.items()
+        if grew_unbounded([row[name] for row in rows], slack)
+    ]
+    if failed:
+        print(f"Unbounded growth in: {', '.join(failed)}", file=sys.stderr)
+        return 1
+    print("Resource use stayed bounded")
+    return 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Lightweight Claude usage tracker")
+    subparsers = parser.add_subparsers(dest='command')
+
+    export = subparsers.add_parser('export', help="export recorded usage history")
+    export.add_argument(
+        'inputs', nargs='*', type=Path,
+        help="history files to export, e.g. from several machines (default: this machine's history)"
+    )
+    export.add_argument('-f', '--format', choices=['csv', 'jsonl', 'parquet'], default='csv')
+    export.add_argument('-o', '--output', default='-', help="output file (default: stdout)")
+    export.add_argument('--since', type=parse_time_arg, help="start time, epoch or ISO 8601 (inclusive)")
+    export.add_argument('--until', type=parse_time_arg, help="end time, epoch or ISO 8601 (exclusive)")
+    export.add_argument('--rollup', type=parse_duration, help="aggregate into buckets, e.g. 5m, 1h, 1d")
+    export.set_defaults(func=run_export)
+
+    collector = subparsers.add_parser(
+        'collector',
+        help="poll usage once and share it with overlays on the LAN (set their collector_url)"
+    )
+    collector.add_argument('--host', default='0.0.0.0')
+    collector.add_argument('--port', type=int, default=COLLECTOR_PORT)
+    collector.set_defaults(func=run_collector)
+
+    snapshot = subparsers.add_parser('snapshot', help="print the latest usage snapshot written by the poller")
+    snapshot.add_argument('--path', type=Path, help="snapshot file (default: this machine's)")
+    snapshot.add_argument('--format', default=DEFAULT_FORMAT, help="format string over the snapshot fields")
+    snapshot.add_argument('--stale-suffix', default=DEFAULT_STALE_SUFFIX)
+    snapshot.set_defaults(func=run_snapshot)
+
+    bench = subparsers.add_parser('bench-memory', help="measure history memory use per sample")
+    bench.add_argument('--days', type=float, default=30, help="simulated run length")
+    bench.add_argument('--interval', type=float, default=10, help="simulated poll interval in seconds")
+    bench.add_argument('--capacity', type=int, default=SAMPLE_RING_CAPACITY)
+    bench.add_argument('--max-growth', type=int, default=1024, help="allowed RSS growth in KiB")
+    bench.set_defaults(func=run_memory_benchmark)
+
+    soak = subparsers.add_parser(
+        'soak',
+        help="run the overlay against a local stand-in API in accelerated time and check for leaks"
+    )
+    soak.add_argument('--days', type=float, default=3, help="virtual run length")
+    soak.add_argument('--speed', type=float, default=3600, help="virtual seconds per real second")
+    soak.add_argument('--poll-interval', type=int, default=60, help="virtual seconds between polls")
+    soak.add_argument('--sample-every', type=float, default=3600, help="virtual seconds between measurements")
+    soak.add_argument('--max-rss-growth', type=float, default=8, help="allowed late RSS growth in MiB")
+    soak.add_argument(
+        '--curves', type=Path,
+        help="JSON file of scripted utilization curves, as in the 'fake_curves' config key"
+    )
+    soak.add_argument('--max-tick-growth', type=float, default=5, help="allowed late tick latency growth in ms")
+    soak.set_defaults(func=run_soak)
+
+    args = parser.parse_args(argv)
+    if not args.command:
+        app = ClaudeUsageBar()
+        app.run()
+        return 0
+
+    return args.func(args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
\ No newline at end of file
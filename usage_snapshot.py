@@ -0,0 +1,82 @@
+"""Reader for the usage snapshot the overlay writes after each fetch.
+
+Kept free of the overlay's dependencies (tkinter, requests) so reading the
+snapshot stays cheap:
+
+    python usage_snapshot.py --format "{five_hour:.0f}%"
+"""
+import os
+import struct
+import sys
+import time
+
+# Fixed-layout snapshot file written by SnapshotFile (see its docstring)
+SNAPSHOT_MAGIC = b'CUSB'
+SNAPSHOT_VERSION = 1
+SNAPSHOT_STRUCT = struct.Struct('<4sHHII6d')
+SNAPSHOT_OFFLINE = 0x1
+
+DEFAULT_FORMAT = "5h {five_hour:.0f}% | 7d {seven_day:.0f}%"
+DEFAULT_STALE_SUFFIX = " (stale)"
+
+
+def default_snapshot_path():
+    """snapshot.bin in the overlay's per-user app data directory"""
+    base = os.getenv('APPDATA') or os.getenv('XDG_CONFIG_HOME') or os.path.join(os.path.expanduser('~'), '.config')
+    return os.path.join(base, 'ClaudeUsageBar', 'snapshot.bin')
+
+
+def read_snapshot(path=None):
+    """Read the latest snapshot with a single read. Returns a dict, or None."""
+    path = path or default_snapshot_path()
+    try:
+        with open(path, 'rb') as f:
+            record = f.read(SNAPSHOT_STRUCT.size)
+    except OSError:
+        return None
+
+    if len(record) != SNAPSHOT_STRUCT.size:
+        return None
+    (magic, version, flags, seq, _, fetched_at, stale_after,
+     five_hour, seven_day, five_hour_resets_at, seven_day_resets_at) = SNAPSHOT_STRUCT.unpack(record)
+    if magic != SNAPSHOT_MAGIC or version != SNAPSHOT_VERSION:
+        return None
+
+    return {
+        'seq': seq,
+        'fetched_at': fetched_at,
+        'five_hour': five_hour,
+        'seven_day': seven_day,
+        'five_hour_resets_at': five_hour_resets_at or None,
+        'seven_day_resets_at': seven_day_resets_at or None,
+        'offline': bool(flags & SNAPSHOT_OFFLINE),
+        'stale': time.time() > stale_after,
+    }
+
+
+def format_snapshot(snapshot, format=DEFAULT_FORMAT, stale_suffix=DEFAULT_STALE_SUFFIX):
+    """Render a snapshot with a format string over its fields"""
+    text = format.format(**snapshot)
+    if snapshot['stale'] or snapshot['offline']:
+        text += stale_suffix
+    return text
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Print the latest usage snapshot written by the poller")
+    parser.add_argument('--path', help="snapshot file (default: this machine's)")
+    parser.add_argument('--format', default=DEFAULT_FORMAT, help="format string over the snapshot fields")
+    parser.add_argument('--stale-suffix', default=DEFAULT_STALE_SUFFIX)
+    args = parser.parse_args(argv)
+
+    snapshot = read_snapshot(args.path)
+    if snapshot is None:
+        return 1
+    print(format_snapshot(snapshot, args.format, args.stale_suffix))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())